@@ -1,12 +1,18 @@
 """Main RAG system implementation."""
 
-
+import json
+import logging
 from rag.vector_store import initialize_vector_store, build_vector_store_from_json
-from rag.retriever import configure_retriever
-from rag.llm import initialize_llm, get_rag_prompt
+from rag.retriever import configure_retriever, BookTitleMatcher
+from rag.llm import initialize_llm, get_rag_prompt, truncate_documents
+from rag.semantic_cache import SemanticCache
 # from utils.feedback_logger import FeedbackLogger
-from utils.error_handling import handle_rag_error
-from interface.config import SCORE_THRESHOLD, JSON_FILE_PATH
+from utils.error_handling import handle_rag_error, handle_rag_stream_error
+from interface.config import (
+    JSON_FILE_PATH, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE
+)
+
+logger = logging.getLogger(__name__)
 
 class IqbalRAGSystem:
     """Manages the RAG system for Iqbal's poetry."""
@@ -16,35 +22,93 @@ class IqbalRAGSystem:
         # Build or load vector store
         self.vector_store = build_vector_store_from_json(JSON_FILE_PATH)
         self.retriever = configure_retriever(self.vector_store)
+        self.book_matcher = BookTitleMatcher.from_json(JSON_FILE_PATH)
         self.llm = initialize_llm()
         self.prompt = get_rag_prompt()
         self.chain = self.prompt | self.llm
+        # One response cache per book filter, so a scoped answer is never served for another book
+        self.response_caches = {}
         # self.feedback_logger = FeedbackLogger()
 
     @handle_rag_error
     def query_rag(self, question):
-        """Process a query through the RAG system."""
-        print(f"**********************************************************************")
-        print(f"query_rag: {question}")
-        docs = self.retriever.invoke(question, config={'score_threshold': SCORE_THRESHOLD})
+        """Process a query through the RAG system and return (answer, poem ids); non-streaming API for scripts."""
+        logger.debug("query_rag: %s", question)
+        query_embedding = self.vector_store.embeddings.embed_query(question)
+        book_filter = self.book_matcher.match_filter(question)
+        response_cache = self._response_cache_for(book_filter)
+        cached = response_cache.lookup(query_embedding)
+        if cached is not None:
+            return cached
+
+        docs = self._retriever_for(book_filter).invoke(question)
         if not docs:
             return "No relevant poems found", []
 
-        print(f"docs: {docs}")
-        context = "\n\n".join(doc.page_content for doc in docs)
-        print(f"context: {context}")
-        context_ids = [doc.metadata.get("poem_id", "") for doc in docs]
-        print(f"context_ids: {context_ids}")
+        logger.debug("docs: %s", docs)
+        context, context_ids = self._build_context(docs, question)
+        logger.debug("context: %s", context)
+        logger.debug("context_ids: %s", context_ids)
         
         response = self.chain.invoke({
             'context': context,
             'question': question
         })
-        print(f"response: {response}")
-        print(f"**********************************************************************")
+        logger.debug("response: %s", response)
+        response_cache.add(query_embedding, (response, context_ids))
         
         return response, context_ids
 
+    @handle_rag_stream_error
+    async def aquery_rag(self, question):
+        """Process a query through the RAG system, streaming the answer as it is generated."""
+        query_embedding = await self.vector_store.embeddings.aembed_query(question)
+        book_filter = self.book_matcher.match_filter(question)
+        response_cache = self._response_cache_for(book_filter)
+        cached = response_cache.lookup(query_embedding)
+        if cached is not None:
+            yield cached[0]
+            return
+
+        docs = await self._retriever_for(book_filter).ainvoke(question)
+        if not docs:
+            yield "No relevant poems found"
+            return
+
+        context, context_ids = self._build_context(docs, question)
+        tokens = []
+        async for token in self.chain.astream({
+            'context': context,
+            'question': question
+        }):
+            tokens.append(token)
+            yield token
+        response_cache.add(query_embedding, ("".join(tokens), context_ids))
+
+    def _response_cache_for(self, book_filter):
+        """Return the semantic cache holding answers retrieved under this book filter."""
+        key = json.dumps(book_filter, sort_keys=True)
+        cache = self.response_caches.get(key)
+        if cache is None:
+            cache = self.response_caches.setdefault(
+                key, SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE)
+            )
+        return cache
+
+    def _retriever_for(self, book_filter):
+        """Return a retriever pre-filtered by the book filter matched from the question, if any."""
+        if book_filter is None:
+            return self.retriever
+        return configure_retriever(self.vector_store, filter=book_filter)
+
+    @staticmethod
+    def _build_context(docs, question):
+        """Fit retrieved documents into the prompt context and collect the poem ids of those included."""
+        # Whole documents are kept in retrieval order; the last one may be cut to fit the window
+        parts = truncate_documents([doc.page_content for doc in docs], question)
+        context_ids = [doc.metadata.get("poem_id", "") for doc in docs[:len(parts)]]
+        return "\n\n".join(parts), context_ids
+
     # def log_feedback(self, query, response, feedback, comment, context_ids):
     #     """Log user feedback."""
     #     self.feedback_logger.log_feedback(query, response, feedback, comment, context_ids)
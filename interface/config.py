@@ -26,13 +26,45 @@ os.makedirs(CHROMA_DB_DIR, exist_ok=True)
 os.makedirs(FEEDBACK_DIR, exist_ok=True)
 
 # RAG settings
-EMBEDDING_MODEL = "llama3"  # This should match your Ollama model name exactly
+EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"  # Sentence-transformers model id on the HF Hub
+EMBEDDING_BATCH_SIZE = 128  # Documents per encoder pass / vector store insert
 LLM_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"   # "microsoft/phi-2"
+LLM_QUANTIZATION = os.getenv("LLM_QUANTIZATION", "4bit").lower()  # "4bit", "8bit" or "none" (GPU only)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "transformers").lower()  # "transformers" or "vllm"
+VLLM_API_BASE = os.getenv("VLLM_API_BASE", "http://localhost:8000/v1")
+LLM_CONTEXT_WINDOW = 2048  # Maximum prompt + generated tokens for LLM_MODEL
+LLM_MAX_NEW_TOKENS = 1024
 RETRIEVER_K = 5
 RETRIEVER_FETCH_K = 20
 RETRIEVER_LAMBDA_MULT = 0.75
 SCORE_THRESHOLD = 0.65
+HNSW_M = 32  # Graph degree of the vector index
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+QUERY_CACHE_SIZE = 1024  # Number of query embeddings kept in memory
+# Cosine similarity above which a cached answer is reused. Calibrated for EMBEDDING_MODEL:
+# bge-small packs related questions into roughly 0.6-1.0, and questions that share their
+# wording but differ in one concept word ("...concept of Khudi" vs "...of Shaheen") can
+# score above 0.8 or 0.9, so a loose threshold serves answers to the wrong question. Re-tune on
+# paraphrase / near-miss pairs when the embedding model changes.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = 512
+# English names of the books, used to scope retrieval when a question mentions one
+BOOK_TITLE_ALIASES = {
+    "Call of the Marching Bell": "Bang-e-Dara",
+    "Gabriel's Wing": "Bal-e-Jibreel",
+    "Rod of Moses": "Zarb-e-Kaleem",
+    "Gift of Hijaz": "Armaghan-e-Hijaz",
+    "Secrets of the Self": "Asrar-e-Khudi",
+    "Mysteries of Selflessness": "Rumuz-e-Bekhudi",
+    "Message of the East": "Payam-e-Mashriq",
+    "Persian Psalms": "Zabur-e-Ajam",
+    "Javid Nama": "Javed Nama",
+    "Book of Eternity": "Javed Nama",
+}
 
 # Gradio settings
 GRADIO_THEME = gr.themes.Soft()  # Import gr here
 GRADIO_SERVER_PORT = int(os.getenv("PORT", 7860))
+GRADIO_CONCURRENCY_LIMIT = 8  # Chat requests served at once
+GRADIO_QUEUE_MAX_SIZE = 64
@@ -1,17 +1,9 @@
 """Gradio interface for the Iqbal Poetry RAG application."""
 
 import gradio as gr
-from interface.config import APP_NAME, GRADIO_THEME, GRADIO_SERVER_PORT
-
-def process_query(question, history):
-    """Process user query through the RAG system."""
-    try:
-        response, _ = rag_system.query_rag(question)
-        return response, _
-    except Exception as e:
-        error_message = f"Error processing query: {str(e)}"
-        print(f"Error in process_query: {error_message}")  # Log error for debugging
-        return error_message
+from interface.config import (
+    APP_NAME, GRADIO_THEME, GRADIO_SERVER_PORT, GRADIO_CONCURRENCY_LIMIT, GRADIO_QUEUE_MAX_SIZE
+)
 
 def handle_feedback(question, response, feedback, comment):
     """Handle user feedback submission."""
@@ -21,6 +13,14 @@ def handle_feedback(question, response, feedback, comment):
     # Since feedback logging is commented out in IqbalRAGSystem, just return success
     return "Feedback logging is currently disabled"
 
+async def chat_response(message, history):
+    """Stream the growing answer for gr.ChatInterface, which expects the full text so far on each update."""
+    # Errors are turned into a final message by aquery_rag's handle_rag_stream_error
+    response = ""
+    async for token in rag_system.aquery_rag(message):
+        response += token
+        yield response
+
 def create_gradio_interface():
     """Create and configure the Gradio interface."""
     with gr.Blocks(theme=GRADIO_THEME, title=APP_NAME) as app:
@@ -30,26 +30,33 @@ def create_gradio_interface():
         The system will search through Iqbal's poems and provide relevant answers based on the content.
         """)
         
-        chatbot = gr.Chatbot(
-            label="Conversation",
-            height=500,
-            type="messages",  # Explicitly set type to 'messages'
-            show_label=True,
-            container=True
+        chat = gr.ChatInterface(
+            fn=chat_response,
+            type="messages",
+            chatbot=gr.Chatbot(
+                label="Conversation",
+                height=500,
+                type="messages",  # Explicitly set type to 'messages'
+                show_label=True,
+                container=True
+            ),
+            textbox=gr.Textbox(
+                placeholder="Ask about philosophical concepts in Iqbal's poetry...",
+                lines=3,
+                show_label=False
+            ),
+            examples=[
+                "Explain Iqbal's concept of Khudi",
+                "Analyze the symbolism in 'The Himalayas' poem",
+                "Compare Iqbal's view of nature with Romantic poets",
+                "What is Iqbal's view on Western materialism?",
+                "Discuss the influence of Rumi on Iqbal's philosophy",
+                "What are the main themes in 'The Secrets of the Self'?",
+                "How does Iqbal view the relationship between God and man?"
+            ],
+            concurrency_limit=GRADIO_CONCURRENCY_LIMIT
         )
         
-        with gr.Row():
-            with gr.Column(scale=4):
-                input_question = gr.Textbox(
-                    label="Your Question",
-                    placeholder="Ask about philosophical concepts in Iqbal's poetry...",
-                    lines=3,
-                    show_label=True
-                )
-            
-            with gr.Column(scale=1):
-                submit_btn = gr.Button("Submit", variant="primary")
-        
         with gr.Accordion("Provide Feedback", open=False):
             feedback_rating = gr.Radio(
                 ["Helpful", "Partially Helpful", "Incorrect"],
@@ -66,58 +73,9 @@ def create_gradio_interface():
             feedback_btn = gr.Button("Submit Feedback")
             feedback_status = gr.Markdown()
         
-        gr.Examples(
-            examples=[
-                "Explain Iqbal's concept of Khudi",
-                "Analyze the symbolism in 'The Himalayas' poem",
-                "Compare Iqbal's view of nature with Romantic poets",
-                "What is Iqbal's view on Western materialism?",
-                "Discuss the influence of Rumi on Iqbal's philosophy",
-                "What are the main themes in 'The Secrets of the Self'?",
-                "How does Iqbal view the relationship between God and man?"
-            ],
-            inputs=input_question
-        )
-        
-        def user_input(user_message, history):
-            if not user_message.strip():
-                return "", history
-            # Convert to new message format
-            history = history + [{"role": "user", "content": user_message}]
-            return "", history
-        
-        def bot_response(history):
-            user_message = history[-1]["content"]
-            bot_message, _ = process_query(user_message, history)
-            # Convert to new message format
-            history = history + [{"role": "assistant", "content": bot_message}]
-            return history
-        
-        submit_btn.click(
-            user_input,
-            [input_question, chatbot],
-            [input_question, chatbot],
-            queue=False
-        ).then(
-            bot_response,
-            chatbot,
-            chatbot
-        )
-        
-        input_question.submit(
-            user_input,
-            [input_question, chatbot],
-            [input_question, chatbot],
-            queue=False
-        ).then(
-            bot_response,
-            chatbot,
-            chatbot
-        )
-        
         feedback_btn.click(
             fn=handle_feedback,
-            inputs=[input_question, chatbot, feedback_rating, feedback_comment],
+            inputs=[chat.textbox, chat.chatbot, feedback_rating, feedback_comment],
             outputs=feedback_status
         )
         
@@ -130,7 +88,10 @@ def launch_gradio_app(system=None):
         globals()['rag_system'] = system
     
     app = create_gradio_interface()
-    app.launch(
+    app.queue(
+        default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT,
+        max_size=GRADIO_QUEUE_MAX_SIZE  # Requests waiting beyond this are rejected instead of piling up
+    ).launch(
         server_name="0.0.0.0",
         server_port=GRADIO_SERVER_PORT,
         share=False,
@@ -1,17 +1,41 @@
 """Embedding functionality for the RAG system."""
 
 import os
-from langchain_ollama import OllamaEmbeddings
-from interface.config import EMBEDDING_MODEL
+import torch
+from functools import lru_cache
+from typing import Callable, List, Optional
+from pydantic import PrivateAttr
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from interface.config import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, QUERY_CACHE_SIZE
+
+
+class CachedEmbeddings(HuggingFaceEmbeddings):
+    """HuggingFaceEmbeddings with an in-process LRU cache for query vectors.
+
+    Questions are normalized (stripped and lowercased) before lookup so that
+    trivially different spellings of the same question share one entry.
+    """
+
+    _query_cache: Optional[Callable[[str], tuple]] = PrivateAttr(default=None)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeated questions."""
+        if self._query_cache is None:
+            self._query_cache = lru_cache(maxsize=QUERY_CACHE_SIZE)(
+                lambda key: tuple(super(CachedEmbeddings, self).embed_query(key))
+            )
+        return list(self._query_cache(text.strip().lower()))
+
 
 def get_embeddings():
     """Initialize and return the embedding model."""
     try:
-        return OllamaEmbeddings(
-            model=EMBEDDING_MODEL,
-            base_url="http://localhost:11434"  # Explicitly set the base URL
+        return CachedEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+            encode_kwargs={"normalize_embeddings": True, "batch_size": EMBEDDING_BATCH_SIZE}
         )
     except Exception as e:
-        print(f"Warning: Failed to initialize OllamaEmbeddings: {e}")
+        print(f"Warning: Failed to initialize HuggingFaceEmbeddings: {e}")
         # Fallback to a different embedding method if needed
         raise
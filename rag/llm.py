@@ -2,12 +2,134 @@
 
 from langchain_community.chat_models import ChatPerplexity
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+import torch
+from functools import lru_cache
+from threading import Thread
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, TextIteratorStreamer, pipeline
 from langchain_community.llms import HuggingFacePipeline
-from interface.config import LLM_MODEL
+from langchain_core.outputs import GenerationChunk
+from interface.config import (
+    LLM_MODEL, LLM_QUANTIZATION, LLM_BACKEND, VLLM_API_BASE, LLM_CONTEXT_WINDOW, LLM_MAX_NEW_TOKENS
+)
 
+RAG_PROMPT_TEMPLATE = """You are an expert on Allama Iqbal's poetry. Use the provided context to answer the question.        
+        ### CONTEXT:{context}        
+        ### QUESTION:{question}        
+        ### ANSWER (Markdown formatted with poetic citations):
+        """
+
+# Decoding settings shared by the blocking pipeline call and the streaming path
+GENERATION_KWARGS = {
+    "do_sample": True,
+    "max_new_tokens": LLM_MAX_NEW_TOKENS,
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "repetition_penalty": 1.1
+}
+
+
+class StreamingHuggingFacePipeline(HuggingFacePipeline):
+    """HuggingFacePipeline whose token stream uses GENERATION_KWARGS and inputs on the model's device.
+
+    The stock `_stream` calls `model.generate` with CPU tensors and without the sampling
+    settings given to `pipeline(...)`, so streamed answers fell back to greedy decoding
+    with the model's default length. Stop sequences are not applied; the RAG chain uses none.
+    """
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        tokenizer = self.pipeline.tokenizer
+        model = self.pipeline.model
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        streamer = TextIteratorStreamer(tokenizer, timeout=60.0, skip_prompt=True, skip_special_tokens=True)
+        generation_kwargs = {
+            **inputs,
+            **GENERATION_KWARGS,
+            "pad_token_id": tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+            "streamer": streamer
+        }
+        errors = []
+
+        def generate():
+            try:
+                model.generate(**generation_kwargs)
+            except Exception as e:
+                # Unblock the consumer now instead of letting it hit the streamer timeout
+                errors.append(e)
+                streamer.end()
+
+        thread = Thread(target=generate, daemon=True)
+        thread.start()
+
+        for text in streamer:
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        thread.join()
+        if errors:
+            raise errors[0]
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """Load the LLM tokenizer once and share it between the pipeline and prompt budgeting."""
+    return AutoTokenizer.from_pretrained(LLM_MODEL, use_fast=True, trust_remote_code=True)
+
+@lru_cache(maxsize=1)
+def get_prompt_prefix_ids():
+    """Token ids of the constant instruction text that precedes the context, tokenized once."""
+    prefix = RAG_PROMPT_TEMPLATE.split("{context}", 1)[0]
+    return tuple(get_tokenizer()(prefix).input_ids)
+
+@lru_cache(maxsize=1)
+def get_prompt_overhead():
+    """Number of tokens the prompt template adds on top of the context and question."""
+    static_text = RAG_PROMPT_TEMPLATE.split("{context}", 1)[1].replace("{question}", "")
+    return len(get_prompt_prefix_ids()) + len(get_tokenizer()(static_text, add_special_tokens=False).input_ids)
+
+def truncate_documents(parts, question, separator="\n\n"):
+    """Keep the leading documents that fit in the model's context window, cutting the last one to fit.
+
+    Returns the (possibly shortened) texts of the documents that made it into the prompt,
+    so callers can report only those as context.
+    """
+    tokenizer = get_tokenizer()
+    question_tokens = len(tokenizer(question, add_special_tokens=False).input_ids)
+    budget = LLM_CONTEXT_WINDOW - LLM_MAX_NEW_TOKENS - get_prompt_overhead() - question_tokens
+    if budget <= 0 or not parts:
+        return []
+
+    separator_tokens = len(tokenizer(separator, add_special_tokens=False).input_ids)
+    kept = []
+    for part, part_ids in zip(parts, tokenizer(list(parts), add_special_tokens=False).input_ids):
+        if kept:
+            budget -= separator_tokens
+        if budget <= 0:
+            break
+        if len(part_ids) <= budget:
+            kept.append(part)
+            budget -= len(part_ids)
+            continue
+        kept.append(tokenizer.decode(part_ids[:budget], skip_special_tokens=True))
+        break
+    return kept
+
+def get_quantization_config():
+    """Return the bitsandbytes config for LLM_QUANTIZATION, or None to load unquantized weights."""
+    # bitsandbytes kernels need a CUDA device; CPU runs keep the default dtype
+    if LLM_QUANTIZATION not in ("4bit", "8bit") or not torch.cuda.is_available():
+        return None
+    if LLM_QUANTIZATION == "8bit":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    return BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.float16,
+        bnb_4bit_quant_type="nf4"
+    )
+
+@lru_cache(maxsize=1)
 def initialize_llm():
-    """Initialize and return the LLM."""
+    """Initialize and return the LLM, loading the model only once per process."""
     # return ChatPerplexity(
     #     pplx_api_key=PERPLEXITY_API_KEY,
     #     model=LLM_MODEL,
@@ -15,27 +137,53 @@ def initialize_llm():
     #     max_tokens=1024
     # )
 
-    tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL, trust_remote_code=True)
+    if LLM_BACKEND == "vllm":
+        return initialize_vllm()
+
+    tokenizer = get_tokenizer()
+    quantization_config = get_quantization_config()
+    if quantization_config is not None:
+        model_kwargs = {"quantization_config": quantization_config}
+    else:
+        model_kwargs = {"torch_dtype": "auto"}  # enables FP16 if available
     model = AutoModelForCausalLM.from_pretrained(
         LLM_MODEL,
         trust_remote_code=True,
         device_map="auto",
-        torch_dtype="auto"  # enables FP16 if available
+        **model_kwargs
     )
+    model.eval()  # inference only: no dropout
 
     pipe = pipeline(
         "text-generation",
         model=model,
         tokenizer=tokenizer,
-        do_sample=True,
-        max_new_tokens=1024,
-        temperature=0.7,
-        top_p=0.9,
-        repetition_penalty=1.1,
-        return_full_text=False
+        return_full_text=False,
+        **GENERATION_KWARGS
     )
 
-    return HuggingFacePipeline(pipeline=pipe)
+    return StreamingHuggingFacePipeline(pipeline=pipe)
+
+
+def initialize_vllm():
+    """Return an LLM backed by a vLLM OpenAI-compatible server.
+
+    The server batches concurrent requests into shared decode steps (continuous
+    batching over a paged KV cache), which a per-process `model.generate` cannot.
+    Start it with, e.g.:
+        python -m vllm.entrypoints.openai.api_server --model <LLM_MODEL> --dtype float16 --gpu-memory-utilization 0.6
+    """
+    from langchain_community.llms import VLLMOpenAI  # needs the optional `openai` package
+
+    return VLLMOpenAI(
+        openai_api_key="EMPTY",
+        openai_api_base=VLLM_API_BASE,
+        model_name=LLM_MODEL,
+        max_tokens=GENERATION_KWARGS["max_new_tokens"],
+        temperature=GENERATION_KWARGS["temperature"],
+        top_p=GENERATION_KWARGS["top_p"],
+        model_kwargs={"extra_body": {"repetition_penalty": GENERATION_KWARGS["repetition_penalty"]}}
+    )
 
 
 def get_rag_prompt():
@@ -47,11 +195,5 @@ def get_rag_prompt():
     #     Answer in structured Markdown:"""
     # )
 
-    return PromptTemplate.from_template(
-        """You are an expert on Allama Iqbal's poetry. Use the provided context to answer the question.        
-        ### CONTEXT:{context}        
-        ### QUESTION:{question}        
-        ### ANSWER (Markdown formatted with poetic citations):
-        """
-    )
+    return PromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
 
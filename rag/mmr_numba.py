@@ -0,0 +1,54 @@
+"""Numba-compiled maximal marginal relevance (MMR) selection."""
+
+import numpy as np
+from numba import njit
+
+
+# Fast-math without 'nnan'/'ninf': the -inf sentinel below must compare correctly
+@njit(fastmath={"nsz", "arcp", "contract", "afn", "reassoc"}, cache=True)
+def mmr_select(sim_q, sim_dd, k, lam):
+    """
+    Select `k` candidates that balance query relevance against redundancy.
+
+    Args:
+        sim_q (np.ndarray): 1-D similarities between the query and each candidate
+        sim_dd (np.ndarray): 2-D pairwise similarities between candidates
+        k (int): Number of candidates to select
+        lam (float): Weight of relevance versus diversity (1.0 = relevance only)
+
+    Returns:
+        np.ndarray: Indices of the selected candidates, in selection order
+    """
+    n = sim_q.shape[0]
+    k = min(k, n)
+    selected = np.empty(k, dtype=np.int64)
+    if k == 0:
+        return selected
+
+    chosen = np.zeros(n, dtype=np.bool_)
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.empty(n, dtype=sim_dd.dtype)
+
+    best = np.argmax(sim_q)
+    selected[0] = best
+    chosen[best] = True
+    for j in range(n):
+        redundancy[j] = sim_dd[best, j]
+
+    for s in range(1, k):
+        best = -1
+        best_score = -np.inf
+        for i in range(n):
+            if chosen[i]:
+                continue
+            score = lam * sim_q[i] - (1.0 - lam) * redundancy[i]
+            if score > best_score:
+                best_score = score
+                best = i
+        selected[s] = best
+        chosen[best] = True
+        for j in range(n):
+            if sim_dd[best, j] > redundancy[j]:
+                redundancy[j] = sim_dd[best, j]
+
+    return selected
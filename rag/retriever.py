@@ -1,14 +1,132 @@
 """Retriever configuration for the RAG system."""
 
-from interface.config import RETRIEVER_K, RETRIEVER_FETCH_K, RETRIEVER_LAMBDA_MULT
+import re
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import VectorStoreRetriever
+from rag.mmr_numba import mmr_select
+from rag.vector_store import load_poems_json
+from interface.config import (
+    RETRIEVER_K, RETRIEVER_FETCH_K, RETRIEVER_LAMBDA_MULT, SCORE_THRESHOLD, BOOK_TITLE_ALIASES
+)
 
-def configure_retriever(vector_store):
-    """Configure and return the retriever."""
-    return vector_store.as_retriever(
+
+class NumbaMMRRetriever(VectorStoreRetriever):
+    """MMR retriever for Chroma that re-ranks the fetched candidates with the compiled `mmr_select` kernel.
+
+    Candidates whose cosine similarity to the query is below `score_threshold` are
+    discarded before the MMR step.
+    """
+
+    def _get_relevant_documents(self, query, *, run_manager, **kwargs):
+        search_kwargs = self.search_kwargs | kwargs
+        query_embedding = np.asarray(self.vectorstore.embeddings.embed_query(query), dtype=np.float32)
+        results = self.vectorstore._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=search_kwargs.get('fetch_k', RETRIEVER_FETCH_K),
+            where=search_kwargs.get('filter'),
+            include=["documents", "metadatas", "embeddings"]
+        )
+        if not results["ids"][0]:
+            return []
+
+        # Stored embeddings are normalized, so dot products are cosine similarities
+        candidates = np.asarray(results["embeddings"][0], dtype=np.float32)
+        query_embedding /= np.linalg.norm(query_embedding)
+        sim_q = candidates @ query_embedding
+
+        # Drop weak matches before MMR so diversity never pulls in irrelevant poems
+        keep = np.flatnonzero(sim_q >= search_kwargs.get('score_threshold', SCORE_THRESHOLD))
+        if keep.size == 0:
+            return []
+        candidates = candidates[keep]
+        selected = keep[mmr_select(
+            sim_q[keep],
+            candidates @ candidates.T,
+            search_kwargs.get('k', RETRIEVER_K),
+            search_kwargs.get('lambda_mult', RETRIEVER_LAMBDA_MULT)
+        )]
+        return [
+            Document(
+                id=results["ids"][0][i],
+                page_content=results["documents"][0][i],
+                metadata=results["metadatas"][0][i] or {}
+            )
+            for i in selected
+        ]
+
+    async def _aget_relevant_documents(self, query, *, run_manager, **kwargs):
+        return await run_in_executor(
+            None, self._get_relevant_documents, query, run_manager=run_manager.get_sync(), **kwargs
+        )
+
+
+def configure_retriever(vector_store, filter=None):
+    """Configure and return the retriever, optionally restricted by a metadata filter."""
+    search_kwargs = {
+        'k': RETRIEVER_K,
+        'fetch_k': RETRIEVER_FETCH_K,
+        'lambda_mult': RETRIEVER_LAMBDA_MULT,
+        'score_threshold': SCORE_THRESHOLD
+    }
+    if filter:
+        search_kwargs['filter'] = filter
+
+    return NumbaMMRRetriever(
+        vectorstore=vector_store,
         search_type="mmr",
-        search_kwargs={
-            'k': RETRIEVER_K,
-            'fetch_k': RETRIEVER_FETCH_K,
-            'lambda_mult': RETRIEVER_LAMBDA_MULT
-        }
+        search_kwargs=search_kwargs
     )
+
+
+def _normalize(text):
+    """Lowercase text and collapse punctuation so 'Bang-e-Dara' matches 'bang e dara'."""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+class BookTitleMatcher:
+    """Detects book titles mentioned in a question and turns them into a metadata filter."""
+
+    def __init__(self, book_titles, aliases=BOOK_TITLE_ALIASES):
+        """
+        Args:
+            book_titles (Iterable[str]): `book_title` values stored in the vector store
+            aliases (Dict[str, str]): Extra names (e.g. English translations) mapped to a book title
+        """
+        self.titles_by_alias = {}
+        for title in book_titles:
+            # "Armaghan-e-Hijaz (Urdu)" is also matched by a plain "Armaghan-e-Hijaz"
+            for alias in (title, re.sub(r"\s*\(.*?\)", "", title)):
+                self.titles_by_alias.setdefault(_normalize(alias), set()).add(title)
+        for alias, title in aliases.items():
+            prefix = _normalize(title)
+            matches = {t for t in book_titles if _normalize(t).startswith(prefix)}
+            if matches:
+                self.titles_by_alias.setdefault(_normalize(alias), set()).update(matches)
+
+        # Longest aliases first so the most specific title wins
+        alternatives = sorted(filter(None, self.titles_by_alias), key=len, reverse=True)
+        # An empty alternation would match the empty string at every word boundary
+        self.pattern = (
+            re.compile(r"\b(" + "|".join(map(re.escape, alternatives)) + r")\b") if alternatives else None
+        )
+
+    @classmethod
+    def from_json(cls, json_file_path):
+        """Build a matcher from the book titles in the RAG poems JSON."""
+        poems_data = load_poems_json(json_file_path)
+        return cls({poem["book_title"] for poem in poems_data if poem.get("book_title")})
+
+    def match_filter(self, question):
+        """Return a Chroma filter for the books named in the question, or None."""
+        if self.pattern is None:
+            return None
+        titles = set()
+        for match in self.pattern.finditer(_normalize(question)):
+            titles |= self.titles_by_alias[match.group(1)]
+        if not titles:
+            return None
+        if len(titles) == 1:
+            return {"book_title": {"$eq": titles.pop()}}
+        return {"book_title": {"$in": sorted(titles)}}
@@ -0,0 +1,61 @@
+"""Semantic response cache for the RAG system."""
+
+import threading
+import faiss
+import numpy as np
+
+
+class SemanticCache:
+    """Reuse answers for questions that embed close to one already answered.
+
+    Query vectors are L2-normalized and kept in a FAISS inner-product index, so a
+    search returns the cosine similarity to the closest cached question. Entries
+    beyond `maxsize` are evicted least-recently-used first.
+    """
+
+    def __init__(self, threshold, maxsize):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._index = None  # created on first insert, once the dimension is known
+        self._payload = []
+        self._last_used = []
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _as_query(embedding):
+        """Return the embedding as a normalized (1, dim) float32 array."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, embedding):
+        """Return the cached payload for a similar question, or None."""
+        vector = self._as_query(embedding)
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, 1)
+            position = int(ids[0, 0])
+            if position < 0 or scores[0, 0] < self.threshold:
+                return None
+            self._clock += 1
+            self._last_used[position] = self._clock
+            return self._payload[position]
+
+    def add(self, embedding, payload):
+        """Cache the payload for a question, evicting the least recently used entry if full."""
+        vector = self._as_query(embedding)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexFlatIP(vector.shape[1])
+            if self._index.ntotal >= self.maxsize:
+                # Flat indexes renumber on removal, which keeps ids aligned with the lists
+                oldest = int(np.argmin(self._last_used))
+                self._index.remove_ids(np.array([oldest], dtype=np.int64))
+                del self._payload[oldest]
+                del self._last_used[oldest]
+            self._clock += 1
+            self._index.add(vector)
+            self._payload.append(payload)
+            self._last_used.append(self._clock)
@@ -1,33 +1,79 @@
 """Vector store management for the RAG system."""
 
-import json
+import mmap
 import os
+import shutil
+import orjson
+import xxhash
 from langchain_chroma import Chroma  # Updated import
 from langchain_core.documents import Document
-from interface.config import CHROMA_DB_DIR
+from interface.config import (
+    CHROMA_DB_DIR, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+)
 from rag.embeddings import get_embeddings
 
+# HNSW index settings, applied when the collection is first created
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",  # embeddings are normalized, so cosine matches inner product
+    "hnsw:M": HNSW_M,
+    "hnsw:construction_ef": HNSW_EF_CONSTRUCTION,
+    "hnsw:search_ef": HNSW_EF_SEARCH
+}
+
+# Fingerprint of the data the persisted store was built from, written once a build completes
+SOURCE_HASH_FILE = os.path.join(CHROMA_DB_DIR, "source.xxh3")
+
 def initialize_vector_store():
     """Initialize and return the Chroma vector store."""
     embeddings = get_embeddings()
     return Chroma(
         persist_directory=CHROMA_DB_DIR,
-        embedding_function=embeddings
+        embedding_function=embeddings,
+        collection_metadata=COLLECTION_METADATA
     )
 
+def load_poems_json(json_file_path):
+    """Parse the poems JSON straight from a memory-mapped view of the file."""
+    with open(json_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+def compute_source_hash(json_file_path):
+    """Hash the poems JSON (via mmap) together with the embedding model and index settings applied at build time."""
+    hasher = xxhash.xxh3_64()
+    with open(json_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            hasher.update(mm)
+    hasher.update(EMBEDDING_MODEL.encode("utf-8"))
+    # HNSW settings only take effect when the collection is created, so changing them needs a rebuild
+    hasher.update(orjson.dumps(COLLECTION_METADATA, option=orjson.OPT_SORT_KEYS))
+    return hasher.hexdigest()
+
+def read_stored_source_hash():
+    """Return the fingerprint saved with the persisted store, or None if there is none."""
+    try:
+        with open(SOURCE_HASH_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
 def build_vector_store_from_json(json_file_path):
     """Build and persist a vector store from JSON data."""
-    # Check if vector store already exists
-    if os.path.exists(CHROMA_DB_DIR) and os.listdir(CHROMA_DB_DIR):
-        print(f"Vector store already exists at {CHROMA_DB_DIR}. Skipping creation.")
+    # Reuse the persisted store only if it was fully built from this exact data
+    source_hash = compute_source_hash(json_file_path)
+    if read_stored_source_hash() == source_hash:
+        print(f"Vector store at {CHROMA_DB_DIR} is up to date. Skipping creation.")
         return initialize_vector_store()
+
+    if os.path.exists(CHROMA_DB_DIR) and os.listdir(CHROMA_DB_DIR):
+        print(f"Vector store at {CHROMA_DB_DIR} is stale or incomplete. Rebuilding...")
+        shutil.rmtree(CHROMA_DB_DIR)
     
     print(f"Building vector store from {json_file_path}...")
     embeddings = get_embeddings()
     
     # Load JSON data
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        poems_data = json.load(f)
+    poems_data = load_poems_json(json_file_path)
     
     # Convert to documents
     documents = []
@@ -58,13 +104,18 @@ def build_vector_store_from_json(json_file_path):
     
     print(f"Creating vector store with {len(documents)} documents...")
     
-    # Create vector store
+    # Create vector store and embed documents in batches, one encoder pass per batch
     os.makedirs(CHROMA_DB_DIR, exist_ok=True)
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=CHROMA_DB_DIR
+    vector_store = Chroma(
+        persist_directory=CHROMA_DB_DIR,
+        embedding_function=embeddings,
+        collection_metadata=COLLECTION_METADATA
     )
+    for start in range(0, len(documents), EMBEDDING_BATCH_SIZE):
+        vector_store.add_documents(documents[start:start + EMBEDDING_BATCH_SIZE])
+
+    with open(SOURCE_HASH_FILE, 'w', encoding='utf-8') as f:
+        f.write(source_hash)
     
     print(f"Vector store created and persisted at {CHROMA_DB_DIR}")
     return vector_store
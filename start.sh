@@ -1,9 +1,3 @@
 #!/usr/bin/env bash
-# install Ollama
-curl -sSfL https://ollama.ai/install.sh | sh
-
-# optionally pull a model
-ollama pull llama3
-
-# then start your app
+# start the app (embedding and LLM models are pulled from the HF Hub on first run)
 python app.py
@@ -1,14 +1,31 @@
 # Standard library imports
 import os
 import json
+import hashlib
 import logging
+import mmap
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 
 # Third-party imports
 import yaml
 from tqdm import tqdm
 
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed parser
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+try:
+    import orjson  # Rust-backed JSON encoder
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -20,6 +37,77 @@ logging.basicConfig(
 )
 logger = logging.getLogger("DatasetCurator")
 
+# Bump when the curated structure changes so stale caches are not reused
+CURATION_CACHE_VERSION = 2
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _scan_yaml(directory: Path, prefix: str = "") -> List[str]:
+    """
+    List YAML files in a directory with a single scandir pass
+    
+    Args:
+        directory (Path): Directory to scan
+        prefix (str): Required file name prefix
+        
+    Returns:
+        List[str]: Sorted paths of the matching regular files
+    """
+    with os.scandir(directory) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.name.startswith(prefix) and entry.name.endswith(".yaml")
+            and entry.is_file(follow_symlinks=False)
+        )
+
+
+def _read_yaml(path: str) -> Dict:
+    """Parse a YAML file with the fastest available safe loader, reading it through mmap."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None  # mmap cannot map an empty file; yaml.load("") is None too
+        # The loader pulls bytes straight from the mapped pages and detects the encoding itself
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return yaml.load(mm, Loader=SafeLoader)
+
+
+@lru_cache(maxsize=256)
+def _load_yaml_cached(path_str: str, mtime: float) -> MappingProxyType:
+    """
+    Parse a YAML file once per (path, mtime); edited files miss the cache and are re-read
+    
+    Args:
+        path_str (str): Path to the YAML file
+        mtime (float): Modification time of the file, part of the cache key
+        
+    Returns:
+        MappingProxyType: Read-only view of the parsed YAML, shared between callers
+    """
+    return MappingProxyType(_read_yaml(path_str))
+
+
+def _parse_poem_worker(path: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """
+    Parse one poem file in a worker process (module level so it can be pickled)
+    
+    Args:
+        path (str): Path to the poem YAML file
+        
+    Returns:
+        Tuple: (poem_id, raw YAML data or None, error message or None)
+    """
+    poem_id = os.path.basename(path)[:-len(".yaml")]
+    try:
+        return poem_id, _read_yaml(path), None
+    except Exception as e:
+        return poem_id, None, str(e)
+
 
 class DatasetCurator:
     """
@@ -79,26 +167,116 @@ class DatasetCurator:
         Main processing pipeline with error handling and progress tracking
         """
         try:
-            book_files = sorted((self.data_root / "lists").glob("List_*.yaml"))
+            # Reuse the previous result if none of the YAML inputs changed since it was cached
+            fingerprint = self._source_fingerprint()
+            cached = self._load_cached_dataset(fingerprint)
+            if cached is not None:
+                logger.info(f"Inputs unchanged, loaded curated dataset from {self.cache_path}")
+                return cached
+            
+            book_files = _scan_yaml(self.data_root / "lists", prefix="List_")
             logger.info(f"Found {len(book_files)} book files to process")
             
+            books = []
+            poem_files = []
+            poem_book_ids = []
             for book_file in tqdm(book_files, desc="Processing books"):
                 book_data = self._load_yaml(book_file)
-                book_id = book_file.stem.split("_")[-1]
+                book_id = os.path.basename(book_file)[:-len(".yaml")].split("_")[-1]
                 processed_book = self._process_book(book_id, book_data)
+                books.append((book_id, processed_book))
+                
+                poem_dir = self.data_root / "poems" / book_id
+                if poem_dir.is_dir():
+                    book_poem_files = _scan_yaml(poem_dir)
+                    poem_files.extend(book_poem_files)
+                    poem_book_ids.extend([book_id] * len(book_poem_files))
+                else:
+                    book_name = processed_book.get("primary_title", f"book_{book_id}")
+                    logger.warning(f"Missing poem directory for book: {book_id}:{book_name}")
+            
+            # Poem files are independent, so parse them on all cores; assembly stays in this process
+            raw_poems = {}
+            with ProcessPoolExecutor() as executor:
+                results = executor.map(_parse_poem_worker, poem_files, chunksize=16)
+                for book_id, (poem_id, raw_data, error) in tqdm(
+                    zip(poem_book_ids, results), total=len(poem_files), desc="Parsing poems"
+                ):
+                    if error is not None:
+                        logger.error(f"Failed processing poem {poem_id}: {error}")
+                        continue
+                    raw_poems.setdefault(book_id, []).append((poem_id, raw_data))
+            
+            for book_id, processed_book in books:
                 self.dataset["books"].append(processed_book)
                 
-                poems = self._process_poems(book_id, processed_book)
+                poems = self._process_poems(book_id, processed_book, raw_poems.get(book_id, []))
                 self.dataset["poems"].extend(poems)          
                 self.dataset["metadata"]["total_poems"] += len(poems)
             self.dataset["metadata"]["total_books"] = len(self.dataset["books"])  
             
+            self._save_cached_dataset(fingerprint)
             return self.dataset
             
         except Exception as e:
             logger.error(f"Processing failed: {str(e)}")
             return None
 
+    @property
+    def cache_path(self) -> Path:
+        """Location of the pickled curated dataset"""
+        return self.output_dir / ".curated.pkl"
+
+    def _source_fingerprint(self) -> str:
+        """
+        Fingerprint the YAML inputs by path, modification time and size
+        
+        Returns:
+            str: Hex digest identifying the current state of the inputs
+        """
+        hasher = hashlib.sha256(f"v{CURATION_CACHE_VERSION}".encode("utf-8"))
+        for path in sorted(self.data_root.glob("**/*.yaml")):
+            stat = path.stat()
+            hasher.update(f"{path.relative_to(self.data_root)}|{stat.st_mtime_ns}|{stat.st_size}\n".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _load_cached_dataset(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Load the pickled dataset if it was curated from inputs with this fingerprint
+        
+        Args:
+            fingerprint (str): Fingerprint of the current inputs
+            
+        Returns:
+            Optional[Dict]: Cached dataset, or None if missing, stale or unreadable
+        """
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable dataset cache {self.cache_path}: {str(e)}")
+            return None
+        
+        if cached.get("fingerprint") != fingerprint:
+            logger.info("Dataset inputs changed since last curation, reprocessing")
+            return None
+        return cached["dataset"]
+
+    def _save_cached_dataset(self, fingerprint: str):
+        """
+        Pickle the curated dataset together with the fingerprint of its inputs
+        
+        Args:
+            fingerprint (str): Fingerprint of the inputs the dataset was built from
+        """
+        try:
+            with open(self.cache_path, "wb") as f:
+                pickle.dump({"fingerprint": fingerprint, "dataset": self.dataset}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Could not write dataset cache {self.cache_path}: {str(e)}")
+
     def _process_book(self, book_id: str, raw_data: Dict) -> Dict:
         """
         Process book metadata with nested section structure
@@ -118,46 +296,41 @@ class DatasetCurator:
         }
         
         # Process multilingual titles
-        for title_entry in raw_data.get("name", []):
-            lang = title_entry.get("lang", "unknown")
-            book_structure["titles"][lang] = title_entry.get("text", "")
-            if lang == 'en':
-                book_structure['primary_title'] = title_entry.get("text", "Unknown")
+        name_entries = raw_data.get("name", ())
+        book_structure["titles"].update(
+            {entry.get("lang", "unknown"): entry.get("text", "") for entry in name_entries}
+        )
+        # Last English entry wins; only a missing text (not an empty one) falls back to "Unknown"
+        en_titles = [entry.get("text", "Unknown") for entry in name_entries if entry.get("lang", "unknown") == "en"]
+        if en_titles:
+            book_structure['primary_title'] = en_titles[-1]
         
-        # Process sections
-        current_section = None
-        for section_data in raw_data.get("sections", []):
+        # Group each named section with the poem lists that follow it (poems before the first name are dropped)
+        grouped_sections = []
+        for section_data in raw_data.get("sections", ()):
             if "sectionName" in section_data:
-                if current_section:
-                    book_structure["sections"].append(current_section)
-                    book_structure["metadata"]["total_sections"] += 1
-                
-                current_section = {
-                    "id": len(book_structure["sections"]) + 1,
-                    "titles": {},
-                    "poems": [],
-                    "poem_ids": [],
-                    "metadata": {"total_poems": 0}
-                }
-                
-                for name_entry in section_data["sectionName"]:
-                    lang = name_entry.get("lang", "unknown")
-                    current_section["titles"][lang] = name_entry.get("text", "")
-            
-            if "poems" in section_data and current_section:
-                poems = self._process_poem_metadata(section_data["poems"])
-                poem_ids = [poem['id'] for poem in poems]
-                current_section["poems"].extend(poems)
-                current_section["poem_ids"].extend(poem_ids)
-                current_section["metadata"]["total_poems"] += len(poems)
-        
-        if current_section:
-            book_structure["sections"].append(current_section)
-            book_structure["metadata"]["total_sections"] += 1
-        
-        book_structure["metadata"]["total_poems"] = sum(
-            len(s["poems"]) for s in book_structure["sections"]
-        )
+                grouped_sections.append((section_data["sectionName"], []))
+            if "poems" in section_data and grouped_sections:
+                grouped_sections[-1][1].append(section_data["poems"])
+        
+        # Process sections
+        section_poems = [
+            list(chain.from_iterable(self._process_poem_metadata(pl) for pl in poem_lists))
+            for _, poem_lists in grouped_sections
+        ]
+        book_structure["sections"] = [
+            {
+                "id": section_id,
+                "titles": {entry.get("lang", "unknown"): entry.get("text", "") for entry in name_entries},
+                "poems": poems,
+                "poem_ids": [poem['id'] for poem in poems],
+                "metadata": {"total_poems": len(poems)}
+            }
+            for section_id, ((name_entries, _), poems) in enumerate(zip(grouped_sections, section_poems), 1)
+        ]
+        
+        book_structure["metadata"]["total_sections"] = len(book_structure["sections"])
+        book_structure["metadata"]["total_poems"] = sum(len(poems) for poems in section_poems)
         return book_structure
     
 
@@ -175,27 +348,24 @@ class DatasetCurator:
         for poem in poems:
             processed_poem = {
                 "id": poem.get("id", ""),
-                "titles": {},
-                "metadata": {"languages": []}  # Changed from set to list
+                "titles": {entry.get("lang", "unknown"): entry.get("text", "") for entry in poem.get("poemName", ())},
+                "metadata": {"languages": []}
             }
-            
-            for title_entry in poem.get("poemName", []):
-                lang = title_entry.get("lang", "unknown")
-                processed_poem["titles"][lang] = title_entry.get("text", "")
-                if lang not in processed_poem["metadata"]["languages"]:
-                    processed_poem["metadata"]["languages"].append(lang)
+            # Title keys are already the distinct languages, in first-seen order
+            processed_poem["metadata"]["languages"] = list(processed_poem["titles"])
             
             processed.append(processed_poem)
         return processed
     
 
-    def _process_poems(self, book_id: str, book_data: Dict) -> List[Dict]:
+    def _process_poems(self, book_id: str, book_data: Dict, raw_poems: List[Tuple[str, Dict]]) -> List[Dict]:
         """
-        Process poem content files with validation and error handling
+        Process parsed poem content with validation and error handling
         
         Args:
             book_id (str): Parent book identifier
             book_data (Dict): Processed book structure
+            raw_poems (List[Tuple[str, Dict]]): (poem_id, raw YAML data) pairs for the book
             
         Returns:
             List[Dict]: Processed poems with flattened content
@@ -203,25 +373,17 @@ class DatasetCurator:
         poems = []
         book_name = book_data.get("primary_title", f"book_{book_id}")
         sections = book_data.get("sections", [])
-        poem_dir = self.data_root / "poems" / book_id
         
-        if not poem_dir.exists():
-            logger.warning(f"Missing poem directory for book: {book_id}:{book_name}")
-            return []
+        # Map each poem to the first section listing it, once per book
+        poem_to_section = {}
+        for section_info in sections:
+            section_ref = (section_info.get('id'), section_info.get('titles', {}).get('en'))
+            for section_poem_id in section_info.get('poem_ids', []):
+                poem_to_section.setdefault(section_poem_id, section_ref)
             
-        for poem_file in poem_dir.glob("*.yaml"):
+        for poem_id, raw_data in raw_poems:
             try:
-                poem_id = poem_file.stem
-                raw_data = self._load_yaml(poem_file)
-                
-                # Create the generator expression, broken for readability
-                sectioninfo_generator = (
-                    (section_info.get('id'), section_info.get('titles', {}).get('en'))
-                    for section_info in sections
-                    if poem_id in section_info.get('poem_ids', [])
-                )
-                # Use next() with the generator and a default tuple
-                section_id, section_name = next(sectioninfo_generator, (None, None))
+                section_id, section_name = poem_to_section.get(poem_id, (None, None))
                 # Create poem structure
                 poem = {
                     "id": poem_id,
@@ -234,21 +396,17 @@ class DatasetCurator:
                 }
                 
                 # Process descriptions
-                for desc_entry in raw_data.get("description", []):
-                    lang = desc_entry.get("lang", "unknown")
-                    poem["content"]["descriptions"][lang] = desc_entry.get("text", "")
-                    if lang not in poem["metadata"]["languages"]:
-                        poem["metadata"]["languages"].append(lang)
+                poem["content"]["descriptions"].update(
+                    {entry.get("lang", "unknown"): entry.get("text", "") for entry in raw_data.get("description", ())}
+                )
+                # Dict keys act as an insertion-ordered set of languages
+                languages = dict.fromkeys(poem["content"]["descriptions"])
                 
                 # Process verses with language detection
-                for verse in raw_data.get("sher", []):
-                    processed_verse = self._process_verse(verse)
-                    poem["content"]["verses"].append(processed_verse)
-                    # Detect verse languages
-                    for content in verse.get("sherContent", []):
-                        lang = content.get("lang", "unknown")
-                        if lang not in poem["metadata"]["languages"]:
-                            poem["metadata"]["languages"].append(lang)
+                verse_results = [self._process_verse(verse) for verse in raw_data.get("sher", ())]
+                poem["content"]["verses"] = [processed_verse for processed_verse, _ in verse_results]
+                languages.update(dict.fromkeys(chain.from_iterable(langs for _, langs in verse_results)))
+                poem["metadata"]["languages"] = list(languages)
                 
                 # Flatten structure with complete English detection
                 rag_poem = self._flatten_for_rag(poem)
@@ -259,7 +417,7 @@ class DatasetCurator:
         
         return poems
 
-    def _process_verse(self, verse: Dict) -> Dict:
+    def _process_verse(self, verse: Dict) -> Tuple[Dict, Iterable[str]]:
         """
         Process individual verse with multilingual content
         
@@ -267,7 +425,7 @@ class DatasetCurator:
             verse (Dict): Raw verse data from YAML
             
         Returns:
-            Dict: Processed verse structure
+            Tuple: (processed verse structure, languages found in the verse in first-seen order)
         """
         processed = {
             "id": verse.get("id", ""),
@@ -282,7 +440,8 @@ class DatasetCurator:
                 "notes": [self._process_note(n) for n in content_entry.get("notes", [])]
             }
         
-        return processed
+        # Content is keyed by language, so its keys are the verse's distinct languages
+        return processed, processed["content"].keys()
     
 
     def _process_note(self, note: Dict) -> Dict:
@@ -322,30 +481,20 @@ class DatasetCurator:
             "full_text": ""
         }
 
-        # Extract English content from all sources
-        en_content = {
-            "descriptions": poem["content"]["descriptions"].get("en", ""),
-            "verses": [],
-            "phrases": []
-        }
-
-        # Process verses
-        for verse in poem["content"]["verses"]:
-            if "en" in verse["content"]:
-                en_content["verses"].append(verse["content"]["en"]["text"])
-                en_content["phrases"].extend(
-                    f"{note['phrase']}: {note['meaning']}"
-                    for note in verse["content"]["en"].get("notes", [])
-                )
+        # English side of every verse that has one
+        en_verses = [verse["content"]["en"] for verse in poem["content"]["verses"] if "en" in verse["content"]]
 
         # Build full text if English content exists
-        if en_content["verses"]:
-            rag_poem["full_text"] = "\n\n".join([
-                en_content["descriptions"],
-                "\n".join(en_content["verses"])
-            ])
-            rag_poem["text_blocks"] = en_content["verses"]
-            rag_poem["phrases"] = en_content["phrases"]
+        if en_verses:
+            verse_texts = [verse["text"] for verse in en_verses]
+            description = poem["content"]["descriptions"].get("en", "")
+            rag_poem["full_text"] = description + "\n\n" + "\n".join(verse_texts)
+            rag_poem["text_blocks"] = verse_texts
+            rag_poem["phrases"] = [
+                f"{note['phrase']}: {note['meaning']}"
+                for verse in en_verses
+                for note in verse.get("notes", ())
+            ]
             return rag_poem
         
         logger.warning(f"No English content found for poem {poem['id']}")
@@ -356,31 +505,57 @@ class DatasetCurator:
         """Save datasets with proper serialization checks"""
         base_path = self.output_dir / "iqbal_poems"
         
-        # Save full dataset
-        with open(f"{base_path}_full.json", "w", encoding="utf-8") as f:
-            json.dump(self.dataset, f, ensure_ascii=True, indent=2)
+        # Save full dataset, streamed one book/poem at a time
+        with open(f"{base_path}_full.json", "wb") as f:
+            f.write(b'{"metadata":')
+            f.write(_dumps(self.dataset["metadata"]))
+            f.write(b',"books":')
+            self._write_json_array(f, self.dataset["books"])
+            f.write(b',"poems":')
+            self._write_json_array(f, self.dataset["poems"])
+            f.write(b'}')
         
         # Save RAG-optimized poems (only those with English content)
-        rag_data = [p for p in self.dataset["poems"] if p is not None]
+        rag_data = (p for p in self.dataset["poems"] if p is not None)
         
-        with open(f"{base_path}_rag.json", "w", encoding="utf-8") as f:
-            json.dump(rag_data, f, ensure_ascii=True, indent=2)
+        with open(f"{base_path}_rag.json", "wb") as f:
+            saved = self._write_json_array(f, rag_data)
+        
+        logger.info(f"Saved {saved} RAG-ready poems")
+
+    @staticmethod
+    def _write_json_array(f, items) -> int:
+        """
+        Write items to an open file as a compact JSON array, one element at a time
         
-        logger.info(f"Saved {len(rag_data)} RAG-ready poems")
+        Args:
+            f: Binary file opened for writing (output is UTF-8)
+            items: Iterable of JSON-serializable objects
+            
+        Returns:
+            int: Number of items written
+        """
+        f.write(b'[')
+        count = 0
+        for count, item in enumerate(items, 1):
+            if count > 1:
+                f.write(b',')
+            f.write(_dumps(item))
+        f.write(b']')
+        return count
 
-    def _load_yaml(self, path: Path) -> Dict:
+    def _load_yaml(self, path: str) -> Dict:
         """
         Safe YAML loader with validation
         
         Args:
-            path (Path): Path to YAML file
+            path (str): Path to YAML file
             
         Returns:
-            Dict: Parsed YAML content
+            Mapping: Parsed YAML content (read-only, cached per path and mtime)
         """
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
+            return _load_yaml_cached(str(path), os.stat(path).st_mtime)
         except Exception as e:
             logger.error(f"Failed loading YAML from {path}: {str(e)}")
             raise
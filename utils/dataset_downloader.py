@@ -1,13 +1,21 @@
 # External imports
 import os
+import shutil
 import requests
 import yaml
-import time
 import logging
 
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed parser
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
 
 
 # Configure logging
@@ -53,6 +61,16 @@ class DatasetDownloader:
         # Constant variables
         self.sources = SOURCES
 
+        # Shared keep-alive session; retries with backoff replace fixed sleeps between requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers * 2,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
 
     def download_from_github(self, source_name: str = "github_iqbal_demystified"):
         """Download dataset from GitHub."""
@@ -72,73 +90,64 @@ class DatasetDownloader:
             os.makedirs(output_path, exist_ok=True)
 
         # Fetch the list metadata from the GitHub repository
-        book_ids = self._download_github_lists(source_name, base_url, folder="lists")
+        book_lists = self._download_github_lists(source_name, base_url, folder="lists")
         # Fetch the poems from the GitHub repository
-        poem_ids = self._download_github_poems(source_name, base_url, folder="poems", book_ids=book_ids)
+        poem_ids = self._download_github_poems(source_name, base_url, folder="poems", book_lists=book_lists)
 
         logger.info(f"Completed fetching data from Iqbal Demystified GitHub repository. Total poems fetched: {len(poem_ids)}")
 
     
-    def _download_github_lists(self, source_name: str, base_url: str, folder: str) -> list:
-        """Fetch the list metadata from the GitHub repository."""
+    def _download_github_lists(self, source_name: str, base_url: str, folder: str) -> dict:
+        """Fetch the list metadata from the GitHub repository and return it parsed, keyed by book id."""
 
         logger.info(f"Fetching book metadata from {folder} folder")
         
         book_ids = []
+        work_items = []
+        # One directory read instead of a stat per book
+        existing = set(os.listdir(self.output_dir / source_name / folder))
         # Fetch the metadata for each book along with the poems
-        for index in tqdm(range(self.number_of_books), desc="Fetching book metadata"):
+        for index in range(self.number_of_books):
             book_id = f"{index+1:03}"
             # Create the output path for the book
             output_path = self.output_dir / source_name / folder / f"List_{book_id}.yaml"
             # Fetch the metadata for the book using requests
             metadata_url = f"{base_url}/lists/List_{book_id}.yaml"
             # Skip if already downloaded
-            if output_path.exists():
+            if output_path.name in existing:
                 logger.debug(f"List_{book_id}.yaml already exists, skipping download")
                 book_ids.append(book_id)
                 continue
+            work_items.append((book_id, metadata_url, output_path))
 
-            try:
-                response = requests.get(metadata_url)
-                response.raise_for_status()
-                if response.status_code == 200:
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        f.write(response.text)
-                
-                    book_ids.append(book_id)
-                    logger.info(f"Successfully fetched List_{book_id}.yaml")
-            except Exception as e:
-                logger.error(f"Error fetching metadata for {book_id}: {e}")
-            
-            # Respect rate limits
-            time.sleep(0.5)
+        book_ids.extend(self._download_all(work_items, desc="Fetching book metadata"))
+        book_ids.sort()
 
         logger.info(f"Fetched {len(book_ids)} book lists")
-        return book_ids
+
+        # Parse each list once here so the poem fetch doesn't re-open and re-parse it
+        book_lists = {}
+        for book_id in book_ids:
+            metadata_path = self.output_dir / source_name / folder / f"List_{book_id}.yaml"
+            try:
+                with open(metadata_path, "r", encoding="utf-8") as f:
+                    book_lists[book_id] = yaml.load(f, Loader=SafeLoader)
+            except Exception as e:
+                logger.error(f"Error parsing list file for book {book_id}: {str(e)}")
+        return book_lists
     
     
-    def _download_github_poems(self, source_name: str, base_url: str, folder: str, book_ids: list) -> list:
-        """Fetch the poems from the GitHub repository."""
+    def _download_github_poems(self, source_name: str, base_url: str, folder: str, book_lists: dict) -> list:
+        """Fetch the poems listed in the parsed list metadata from the GitHub repository."""
         # List to store the fetched poems
         fetched_poems = []
-        # Fetch the poems for each book by first reading the list metadata and then fetching the poems
-        for id in tqdm(book_ids, desc=f"Fetching books metadata, poems and shers"):
-            metadata_path = self.output_dir / source_name / "lists" / f"List_{id}.yaml"
-            if not metadata_path.exists():
-                logger.error(f"Metadata file for book {id} does not exist")
-                continue
-
+        # Fetch the poems for each book using its already parsed list metadata
+        for id, book_metadata in tqdm(book_lists.items(), desc=f"Fetching books metadata, poems and shers"):
             # Create directory for this book's poems
             poems_path = self.output_dir / source_name / folder / id
             os.makedirs(poems_path, exist_ok=True)
-
-            # Load and parse the list file
-            try:
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    book_metadata = yaml.safe_load(f)
-            except Exception as e:
-                logger.error(f"Error parsing list file for book {id}: {str(e)}")
-                continue
+            # One directory read instead of a stat per poem
+            existing = set(os.listdir(poems_path))
  
             # Extract all poem IDs from the list
             poem_ids = []
@@ -149,35 +158,56 @@ class DatasetDownloader:
                             poem_ids.append(poem['id'])
             
             # Fetch each poem
-            fetched_poems = []
-            for poem_id in tqdm(poem_ids, desc=f"Fetching poems for book {id}"):
+            book_start = len(fetched_poems)
+            work_items = []
+            for poem_id in poem_ids:
                 poem_url = f"{base_url}/poems/{id}/{poem_id}.yaml"
                 output_path = poems_path / f"{poem_id}.yaml"
                 
                 # Skip if already downloaded
-                if output_path.exists():
+                if output_path.name in existing:
                     logger.debug(f"Poem {poem_id} already exists, skipping download")
                     fetched_poems.append(poem_id)
                     continue
-                
+                work_items.append((poem_id, poem_url, output_path))
+
+            fetched_poems.extend(self._download_all(work_items, desc=f"Fetching poems for book {id}"))
+
+            logger.info(f"Fetched {len(fetched_poems) - book_start} poems for book {id}")
+        return fetched_poems
+
+
+    def _download_all(self, work_items: list, desc: str) -> list:
+        """Download (key, url, output_path) items concurrently and return the keys fetched successfully."""
+        fetched = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_one, url, output_path): key
+                for key, url, output_path in work_items
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                key = futures[future]
                 try:
-                    response = requests.get(poem_url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        with open(output_path, "w", encoding="utf-8") as f:
-                            f.write(response.text)
-                        
-                        fetched_poems.append(poem_id)
-                        print(f"Successfully fetched poem {poem_id}")
-                    else:
-                        print(f"Failed to fetch poem {poem_id}: {response.status_code}")
-                    
-                    # Respect rate limits
-                    time.sleep(0.5)
-                    
+                    future.result()
                 except Exception as e:
-                    logger.error(f"Error fetching poem {poem_id}: {str(e)}")
+                    logger.error(f"Failed to fetch {key}: {str(e)}")
+                    continue
+
+                fetched.append(key)
+                logger.debug(f"Successfully fetched {key}")
+        return fetched
 
-            logger.info(f"Fetched {len(fetched_poems)} poems for book {id}")
-        return fetched_poems
 
+    def _fetch_one(self, url: str, output_path: Path) -> None:
+        """Fetch a single file over the shared session, streaming it to disk; raises on HTTP errors."""
+        with self.session.get(url, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            # Copy the socket stream straight to disk, undoing any gzip/deflate transfer encoding
+            response.raw.decode_content = True
+            try:
+                with open(output_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, 64 * 1024)
+            except Exception:
+                # Don't leave a truncated file that later runs would treat as downloaded
+                output_path.unlink(missing_ok=True)
+                raise
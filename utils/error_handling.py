@@ -13,3 +13,19 @@ def handle_rag_error(func):
             logger.error(f"Error in RAG system: {str(e)}")
             return f"An error occurred: {str(e)}", []
     return wrapper
+
+
+def handle_rag_stream_error(func):
+    """Decorator for handling RAG system errors in streaming (async generator) methods."""
+    async def wrapper(*args, **kwargs):
+        streamed = False
+        try:
+            async for chunk in func(*args, **kwargs):
+                streamed = True
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error in RAG system: {str(e)}")
+            # Set the message apart from any partial answer already streamed
+            separator = "\n\n" if streamed else ""
+            yield f"{separator}An error occurred: {str(e)}"
+    return wrapper